@@ -1,4 +1,32 @@
-DATA_FILE_COEF = 'streamlit_app/data/df_all_mean.csv'
-DATA_FILE_SHAP_MEAN = 'streamlit_app/data/shap_lgb_mean.csv'
-DATA_FILE_SHAP_SUM = 'streamlit_app/data/shap_lgb_sum.csv'
+import pandas as pd
+
+# Tabular inputs are Parquet copies of the CSVs in data/ (see convert_to_parquet.py)
+DATA_FILE_COEF = 'streamlit_app/data/df_all_mean.parquet'
+DATA_FILE_SHAP_MEAN = 'streamlit_app/data/shap_lgb_mean.parquet'
+DATA_FILE_SHAP_SUM = 'streamlit_app/data/shap_lgb_sum.parquet'
 DATA_FILE_MODEL_PERF = 'streamlit_app/data/model_performance.csv'
+
+# Columns exposed as sidebar filters on every page
+FILTER_COLUMNS = ['Cluster', 'Time Period', 'Frequency', 'Stimulus', 'TargetScore']
+
+# Columns each page reads from its input (only these are loaded from Parquet)
+SHAP_COLUMNS = (*FILTER_COLUMNS, 'SHAP_value')
+COEF_COLUMNS = (*FILTER_COLUMNS, 'features', 'params_significant', 'SHAP_value')
+
+# Canonical order of the EEG dimensions
+CLUSTER_ORDER = ['CL1', 'CL2', 'CL3', 'CL4', 'CL5', 'CL6']
+TIME_PERIOD_ORDER = ['(-4, 0)', '(0, 5)', '(5, 10)']
+FREQUENCY_ORDER = ['delta', 'theta', 'alpha', 'beta', 'lower gamma']
+CATEGORY_ORDERS = {
+    'Cluster': CLUSTER_ORDER,
+    'Time Period': TIME_PERIOD_ORDER,
+    'Frequency': FREQUENCY_ORDER,
+}
+
+# Column types applied when converting the CSV inputs to Parquet (absent columns are ignored)
+COLUMN_DTYPES = {
+    'SHAP_value': 'float32',
+    'params_significant': 'float32',
+    **{col: 'category' for col in FILTER_COLUMNS},
+    **{col: pd.CategoricalDtype(order, ordered=True) for col, order in CATEGORY_ORDERS.items()},
+}
@@ -0,0 +1,21 @@
+# convert_to_parquet.py
+# Title: Convert the CSV inputs to Parquet
+#
+# The dashboard reads the Parquet copies, which are already typed (float32 values,
+# categorical filter columns), need no parsing, and are pre-sorted by Time Period,
+# Frequency and Cluster. Re-run from the repository root after changing any of the
+# source CSVs:
+#     python streamlit_app/convert_to_parquet.py
+
+from pathlib import Path
+
+import pandas as pd
+
+import config
+
+for parquet_path in [config.DATA_FILE_COEF, config.DATA_FILE_SHAP_MEAN, config.DATA_FILE_SHAP_SUM]:
+    csv_path = Path(parquet_path).with_suffix('.csv')
+    df = pd.read_csv(csv_path, engine='pyarrow', dtype=config.COLUMN_DTYPES)
+    df = df.sort_values(['Time Period', 'Frequency', 'Cluster'], kind='stable', ignore_index=True)
+    df.to_parquet(parquet_path, engine='pyarrow', compression='zstd', index=False)
+    print(f"Wrote {parquet_path} from {csv_path}")
@@ -5,19 +5,17 @@ import streamlit as st
 import numpy as np
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 
 import config
+import shared
 
 st.set_page_config(page_title="SHAP values explorer", layout="wide")
 
 st.title("Interactive exploration of SHAP values")
 st.write("Navigate to the pages in the sidebar for other visualizations")
 
-# Load dataset based on toggle
-@st.cache_data
-def load_data(file_path):
-    return pd.read_csv(file_path)
-
 data_source = st.radio(
     "Select Data Source",
     options=["Averaged SHAP Values", "Summed SHAP Values"],
@@ -33,24 +31,33 @@ else:
     aggregation_method = "sum"           # Use sum for aggregation
 
 # Load the selected dataset
-df = load_data(file_path)
+_, options = shared.load_data(file_path, config.SHAP_COLUMNS)
 
 # Sidebar Filters
-st.sidebar.header("Filters")
-selected_clusters = st.sidebar.multiselect("Select Clusters", df['Cluster'].unique(), default=df['Cluster'].unique())
-selected_time_periods = st.sidebar.multiselect("Select Time Periods", df['Time Period'].unique(), default=df['Time Period'].unique())
-selected_frequencies = st.sidebar.multiselect("Select Frequencies", df['Frequency'].unique(), default=df['Frequency'].unique())
-selected_stimuli = st.sidebar.multiselect("Select Stimuli", df['Stimulus'].unique(), default=df['Stimulus'].unique())
-selected_scores = st.sidebar.multiselect("Select Target Scores", df['TargetScore'].unique(), default=df['TargetScore'].unique())
-
-# Filter the DataFrame based on selections
-filtered_df = df[
-    (df['Cluster'].isin(selected_clusters)) &
-    (df['Time Period'].isin(selected_time_periods)) &
-    (df['Frequency'].isin(selected_frequencies)) &
-    (df['Stimulus'].isin(selected_stimuli)) &
-    (df['TargetScore'].isin(selected_scores))
-]
+selections = shared.sidebar_filters(options)
+
+# Aggregate SHAP values per group (memoized per filter state and grouping)
+@st.cache_data
+def aggregate_data(file_path, selections, groupby_columns):
+    filtered_df = shared.filter_data(file_path, selections, config.SHAP_COLUMNS)
+    return shared.group_aggregate(filtered_df, list(groupby_columns), "SHAP_value", "sum")
+
+# Quartiles and whisker ends per box, computed server-side so only O(groups) values reach the browser
+@st.cache_data
+def box_statistics(file_path, selections, group_columns, value_column):
+    filtered_df = shared.filter_data(file_path, selections, config.SHAP_COLUMNS)
+    values = filtered_df.groupby(list(group_columns), observed=True)[value_column]
+    # Quartiles use Hazen interpolation, which is what Plotly's default (linear) quartile method computes
+    def quartile(q):
+        return lambda s: np.quantile(s, q, method="hazen")
+    stats = pd.DataFrame({"q1": values.agg(quartile(0.25)), "median": values.median(), "q3": values.agg(quartile(0.75))})
+    # Whiskers end at the most extreme points within 1.5 IQR of the box, as Plotly draws them
+    q1, q3 = values.transform(quartile(0.25)), values.transform(quartile(0.75))
+    inside = filtered_df[value_column].between(q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1))
+    fences = filtered_df[inside].groupby(list(group_columns), observed=True)[value_column].agg(
+        lowerfence="min", upperfence="max"
+    )
+    return stats.join(fences).reset_index()
 
 # Bar Plot
 st.header("Bar Plot of SHAP Values")
@@ -66,7 +73,7 @@ if bar_col_partition:
     groupby_columns.append(bar_col_partition)
 
 # Aggregate SHAP values for the bar plot
-bar_data = filtered_df.groupby(groupby_columns).agg({"SHAP_value": "sum"}).reset_index()
+bar_data = aggregate_data(file_path, selections, tuple(groupby_columns))
 
 # Create Bar Plot
 fig_bar = px.bar(
@@ -81,6 +88,8 @@ fig_bar = px.bar(
     height=800,
     width=1200,
 )
+# Bar traces have no WebGL variant; drop per-bar outlines to cut SVG path cost with many facets
+fig_bar.update_traces(marker_line_width=0)
 st.plotly_chart(fig_bar, use_container_width=True)
 
 # Box Plot
@@ -90,16 +99,52 @@ box_y_axis = st.selectbox("Select Y-Axis for Box Plot", ["SHAP_value"])
 box_row_partition = st.selectbox("Row Partition for Box Plot (Optional)", [None, "Stimulus", "TargetScore", "Cluster", "Frequency", "Time Period"])
 box_col_partition = st.selectbox("Column Partition for Box Plot (Optional)", [None, "Stimulus", "TargetScore", "Cluster", "Frequency", "Time Period"])
 
-# Create Box Plot
-fig_box = px.box(
-    filtered_df,
-    x=box_x_axis,
-    y=box_y_axis,
-    color=box_col_partition,
-    facet_row=box_row_partition,
-    labels={"SHAP_value": f"{aggregation_method.capitalize()} SHAP Value"},
+# Create Box Plot from the precomputed statistics, one subplot row per row partition value
+box_groups = list(dict.fromkeys(col for col in [box_x_axis, box_col_partition, box_row_partition] if col))
+box_stats = box_statistics(file_path, selections, tuple(box_groups), box_y_axis)
+# A single untitled row when there is no row partition or the filters leave no data
+row_values = (box_stats[box_row_partition].unique().tolist() if box_row_partition else []) or [None]
+color_values = box_stats[box_col_partition].unique().tolist() if box_col_partition else [None]
+fig_box = make_subplots(
+    rows=len(row_values),
+    cols=1,
+    shared_xaxes=True,
+    shared_yaxes="all",
+    vertical_spacing=0.03,
+    row_titles=[f"{box_row_partition}={value}" for value in row_values if value is not None] or None,
+)
+colors = px.colors.qualitative.Plotly
+for row, row_value in enumerate(row_values, start=1):
+    for i, color_value in enumerate(color_values):
+        group = box_stats
+        if box_row_partition:
+            group = group[group[box_row_partition] == row_value]
+        if box_col_partition:
+            group = group[group[box_col_partition] == color_value]
+        fig_box.add_trace(
+            go.Box(
+                x=group[box_x_axis].astype(str),
+                q1=group["q1"],
+                median=group["median"],
+                q3=group["q3"],
+                lowerfence=group["lowerfence"],
+                upperfence=group["upperfence"],
+                name=str(color_value) if box_col_partition else "",
+                legendgroup=str(color_value),
+                offsetgroup=str(color_value),
+                showlegend=bool(box_col_partition) and row == 1,
+                marker_color=colors[i % len(colors)],
+            ),
+            row=row,
+            col=1,
+        )
+fig_box.update_yaxes(title_text=f"{aggregation_method.capitalize()} SHAP Value")
+fig_box.update_xaxes(title_text=box_x_axis, row=len(row_values), col=1)
+fig_box.update_layout(
     title=f"Box Plot of SHAP Values ({box_x_axis} vs {box_y_axis}) ({data_source})",
+    legend_title_text=box_col_partition,
+    boxmode="group",
     height=800,
     width=1200,
 )
-st.plotly_chart(fig_box, use_container_width=True)
\ No newline at end of file
+st.plotly_chart(fig_box, use_container_width=True)
@@ -2,31 +2,23 @@
 # Title: Comparison of Linear and LightGBM parameters
 
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
-from sklearn.preprocessing import MinMaxScaler
 import config
+import shared
 
 # Set Streamlit page layout to wide
 st.set_page_config(page_title="Model Parameters Comparison", layout="wide")
 
 # Load dataset
-@st.cache_data
-def load_data():
-    return pd.read_csv(config.DATA_FILE_COEF)
-
-df_all_test = load_data()
+_, options = shared.load_data(config.DATA_FILE_COEF, config.COEF_COLUMNS)
 
 # Streamlit App Title
 st.title("Comparison of Coefficients from Two Models")
 
 # Sidebar Filters
-st.sidebar.header("Filters")
-selected_clusters = st.sidebar.multiselect("Select Clusters", df_all_test['Cluster'].unique(), default=df_all_test['Cluster'].unique())
-selected_time_periods = st.sidebar.multiselect("Select Time Periods", df_all_test['Time Period'].unique(), default=df_all_test['Time Period'].unique())
-selected_frequencies = st.sidebar.multiselect("Select Frequencies", df_all_test['Frequency'].unique(), default=df_all_test['Frequency'].unique())
-selected_conditions = st.sidebar.multiselect("Select Stimulus", df_all_test['Stimulus'].unique(), default=df_all_test['Stimulus'].unique())
-selected_scores = st.sidebar.multiselect("Select Scores", df_all_test['TargetScore'].unique(), default=df_all_test['TargetScore'].unique())
+selections = shared.sidebar_filters(options)
 
 # Toggle: Raw vs Scaled Values
 show_scaled = st.checkbox("Show Scaled Values (-1 to 1)", value=True)
@@ -36,40 +28,36 @@ partition_rows = st.checkbox("Partition by Stimulus (Rows)", value=False)
 partition_cols = st.checkbox("Partition by TargetScore (Columns)", value=False)
 
 # Filter DataFrame based on selection
-filtered_df = df_all_test[
-    (df_all_test['Cluster'].isin(selected_clusters)) &
-    (df_all_test['Time Period'].isin(selected_time_periods)) &
-    (df_all_test['Frequency'].isin(selected_frequencies)) &
-    (df_all_test['Stimulus'].isin(selected_conditions)) &
-    (df_all_test['TargetScore'].isin(selected_scores))
-]
+filtered_df = shared.filter_data(config.DATA_FILE_COEF, selections, config.COEF_COLUMNS)
 
 # Aggregate (Average) coefficients by Feature, Stimulus, and TargetScore
-grouped_df = filtered_df.groupby(["features", "Stimulus", "TargetScore"], as_index=False).agg({
+grouped_df = filtered_df.groupby(["features", "Stimulus", "TargetScore"], as_index=False, observed=True).agg({
     "params_significant": "mean",
     "SHAP_value": "mean"
 })
 
-# Apply Min-Max Scaling after averaging
+# Apply Min-Max Scaling to (-1, 1) after averaging
 if show_scaled:
-    scaler = MinMaxScaler(feature_range=(-1, 1))
-    grouped_df[['params_significant', 'SHAP_value']] = scaler.fit_transform(
-        grouped_df[['params_significant', 'SHAP_value']]
-    )
-
-# Melt the DataFrame to stack Linear Model and SHAP values for easier plotting
-melted_df = grouped_df.melt(
-    id_vars=["features", "Stimulus", "TargetScore"],
-    value_vars=["params_significant", "SHAP_value"],
-    var_name="Model",
-    value_name="Coefficient Value"
-)
-
-# Map readable labels for models
-melted_df["Model"] = melted_df["Model"].map({
+    scaled_columns = ['params_significant', 'SHAP_value']
+    values = grouped_df[scaled_columns].to_numpy(dtype=np.float32)
+    col_min = np.nanmin(values, axis=0)
+    col_range = np.nanmax(values, axis=0) - col_min
+    col_range[col_range == 0] = 1  # Constant columns map to -1, as with MinMaxScaler
+    grouped_df[scaled_columns] = (values - col_min) / col_range * 2 - 1
+
+# Stack Linear Model and SHAP values into long form (with readable model labels) for easier plotting
+model_labels = {
     "params_significant": "Linear Model Coefficients",
     "SHAP_value": "LightGBM SHAP Values"
-})
+}
+id_columns = ["features", "Stimulus", "TargetScore"]
+long_df = pd.concat(
+    [
+        grouped_df[id_columns].assign(**{"Model": label, "Coefficient Value": grouped_df[column]})
+        for column, label in model_labels.items()
+    ],
+    ignore_index=True
+)
 
 # Select row and column facets dynamically
 facet_row = "Stimulus" if partition_rows else None
@@ -77,7 +65,7 @@ facet_col = "TargetScore" if partition_cols else None
 
 # Create Plotly Express Figure
 fig = px.bar(
-    melted_df,
+    long_df,
     x="features",
     y="Coefficient Value",
     color="Model",  # Linear vs SHAP
@@ -2,49 +2,59 @@
 # Title: Model Cross-Performance Heatmap
 
 import streamlit as st
-import pandas as pd
+import numpy as np
 import plotly.express as px
+from pyarrow import csv
 import config
 
 # Set Streamlit page layout to wide
 st.set_page_config(page_title="Model Cross-Performance", layout="wide")
 
-# Load dataset
+# Load dataset as a plain matrix plus axis labels
 @st.cache_data
 def load_data():
-    return pd.read_csv(config.DATA_FILE_MODEL_PERF, skiprows=1)
-
-# Load the data
-df = load_data()
-
-# Set index to match the original
-df.index = df.columns
+    # First line is a placeholder header; the line after the real header only names the "Train" axis
+    table = csv.read_csv(
+        config.DATA_FILE_MODEL_PERF,
+        read_options=csv.ReadOptions(skip_rows=1, skip_rows_after_names=1),
+    )
+    values = np.column_stack([column.to_numpy() for column in table.columns[1:]])
+    return values, table.column(0).to_pylist(), table.column_names[1:]
 
 # Streamlit App Title
 st.title("Interactive Model Performance Heatmap")
 
-# Create an interactive heatmap using Plotly
-fig = px.imshow(
-    df.values,  # Heatmap data
-    labels=dict(x="Columns", y="Rows", color="Value"),  # Label names
-    x=df.columns,  # Column names
-    y=df.index,  # Row names
-    color_continuous_scale="viridis",  # Color scale
-    zmin=0.5,
-    text_auto=".2f",  # Display values with 2 decimal places
-)
-
-# Update layout for better readability
-fig.update_layout(
-    width=1000,  # Set width
-    height=1000,  # Set height
-    margin=dict(l=50, r=50, t=50, b=50),  # Margins around the heatmap
-    title="Model Performance Heatmap",
-    title_x=0.5,  # Center the title
-    font=dict(size=14),  # Increase font size for overall labels
-    xaxis=dict(title="Columns", title_font=dict(size=18), tickfont=dict(size=14)),  # X-axis font sizes
-    yaxis=dict(title="Rows", title_font=dict(size=18), tickfont=dict(size=14)),  # Y-axis font sizes
-)
+# The figure depends only on the static input file, so it is built once and shared (never mutated)
+@st.cache_resource
+def build_figure():
+    values, row_labels, col_labels = load_data()
+
+    # Create an interactive heatmap using Plotly
+    fig = px.imshow(
+        values,  # Heatmap data
+        labels=dict(x="Columns", y="Rows", color="Value"),  # Label names
+        x=col_labels,  # Column names
+        y=row_labels,  # Row names
+        color_continuous_scale="viridis",  # Color scale
+        zmin=0.5,
+    )
+    # Display values with 2 decimal places, formatted once server-side
+    fig.update_traces(text=np.char.mod('%.2f', values), texttemplate="%{text}")
+
+    # Update layout for better readability
+    fig.update_layout(
+        width=1000,  # Set width
+        height=1000,  # Set height
+        margin=dict(l=50, r=50, t=50, b=50),  # Margins around the heatmap
+        title="Model Performance Heatmap",
+        title_x=0.5,  # Center the title
+        font=dict(size=14),  # Increase font size for overall labels
+        xaxis=dict(title="Columns", title_font=dict(size=18), tickfont=dict(size=14)),  # X-axis font sizes
+        yaxis=dict(title="Rows", title_font=dict(size=18), tickfont=dict(size=14)),  # Y-axis font sizes
+    )
+    return fig
+
+fig = build_figure()
 
 # Display the interactive heatmap in Streamlit
 st.plotly_chart(fig, use_container_width=False)  # Disable container width to respect explicit size
\ No newline at end of file
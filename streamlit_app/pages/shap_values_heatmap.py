@@ -3,12 +3,12 @@ import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
 import config
+import shared
 
 # Set Streamlit page layout to wide
 st.set_page_config(page_title="Fixed Order SHAP Heatmap", layout="wide")
 
-# Define fixed orders and labels
-FREQUENCY_ORDER = ['delta', 'theta', 'alpha', 'beta', 'lower gamma']
+# Define fixed labels (the category orders live in config)
 FREQUENCY_RANGES = {
     'delta': '1-4 Hz',
     'theta': '4-8 Hz',
@@ -17,14 +17,17 @@ FREQUENCY_RANGES = {
     'lower gamma': '30-48 Hz'
 }
 
-TIME_PERIOD_ORDER = ['(-4, 0)', '(0, 5)', '(5, 10)']
 TIME_PERIOD_LABELS = {
     '(-4, 0)': 'Pre-stimulus',
     '(0, 5)': 'Early',
     '(5, 10)': 'Late'
 }
+TIME_PERIOD_COLORS = {
+    '(-4, 0)': 'rgb(70, 130, 180)',   # Steel Blue
+    '(0, 5)': 'rgb(60, 179, 113)',    # Medium Sea Green
+    '(5, 10)': 'rgb(238, 130, 238)'   # Violet
+}
 
-CLUSTER_ORDER = ['CL1', 'CL2', 'CL3', 'CL4', 'CL5', 'CL6']
 CLUSTER_LABELS = {
     'CL1': 'Left Frontal',
     'CL4': 'Right Frontal',
@@ -34,9 +37,15 @@ CLUSTER_LABELS = {
     'CL6': 'Right Posterior'
 }
 
-@st.cache_data
-def load_data(file_path):
-    return pd.read_csv(file_path)
+# Row index and axis labels of the full fixed grid; they depend only on the constants above
+FULL_ROW_INDEX = pd.MultiIndex.from_product(
+    [config.TIME_PERIOD_ORDER, config.FREQUENCY_ORDER], names=["Time Period", "Frequency"]
+)
+ROW_LABELS = tuple(
+    f"{TIME_PERIOD_LABELS[time]}, {freq} ({FREQUENCY_RANGES[freq]})"
+    for time in config.TIME_PERIOD_ORDER for freq in config.FREQUENCY_ORDER
+)
+COL_TICKTEXT = tuple(f"{CLUSTER_LABELS[cl]} ({cl})" for cl in config.CLUSTER_ORDER)
 
 # UI Elements
 st.title("SHAP Values Heatmap")
@@ -54,176 +63,129 @@ else:
     file_path = config.DATA_FILE_SHAP_SUM
     aggregation_method = "sum"
 
-df = load_data(file_path)
-
-# Sidebar Filters
-st.sidebar.header("Filters")
-selected_clusters = st.sidebar.multiselect(
-    "Select Clusters",
-    options=CLUSTER_ORDER,
-    default=CLUSTER_ORDER
-)
-selected_time_periods = st.sidebar.multiselect(
-    "Select Time Periods",
-    options=TIME_PERIOD_ORDER,
-    default=TIME_PERIOD_ORDER
-)
-selected_frequencies = st.sidebar.multiselect(
-    "Select Frequencies",
-    options=FREQUENCY_ORDER,
-    default=FREQUENCY_ORDER
-)
-selected_stimuli = st.sidebar.multiselect(
-    "Select Stimulus",
-    options=df['Stimulus'].unique(),
-    default=df['Stimulus'].unique()
-)
-selected_scores = st.sidebar.multiselect(
-    "Select Target Scores",
-    options=df['TargetScore'].unique(),
-    default=df['TargetScore'].unique()
-)
-
-# Filter the DataFrame
-filtered_df = df[
-    (df['Cluster'].isin(selected_clusters)) &
-    (df['Time Period'].isin(selected_time_periods)) &
-    (df['Frequency'].isin(selected_frequencies)) &
-    (df['Stimulus'].isin(selected_stimuli)) &
-    (df['TargetScore'].isin(selected_scores))
-]
-
-# Create categories with fixed ordering
-filtered_df['Time Period'] = pd.Categorical(
-    filtered_df['Time Period'],
-    categories=TIME_PERIOD_ORDER,
-    ordered=True
-)
-filtered_df['Frequency'] = pd.Categorical(
-    filtered_df['Frequency'],
-    categories=FREQUENCY_ORDER,
-    ordered=True
-)
-filtered_df['Cluster'] = pd.Categorical(
-    filtered_df['Cluster'],
-    categories=CLUSTER_ORDER,
-    ordered=True
-)
-
-# Ensure proper data types and create pivot table
-filtered_df['SHAP_value'] = pd.to_numeric(filtered_df['SHAP_value'], errors='coerce')
-pivot_df = filtered_df.pivot_table(
-    index=["Time Period", "Frequency"],
-    columns="Cluster",
-    values="SHAP_value",
-    aggfunc=aggregation_method,
-    fill_value=0
-)
+_, options = shared.load_data(file_path, config.SHAP_COLUMNS)
+
+# Sidebar Filters (the options already follow the fixed brain-region, time and frequency orders)
+selections = shared.sidebar_filters(options)
+
+# Filter and aggregate into the Time Period/Frequency x Cluster table (memoized per filter state)
+@st.cache_data(show_spinner=False)
+def compute_pivot(file_path, selections, aggregation_method):
+    filtered_df = shared.filter_data(file_path, selections, config.SHAP_COLUMNS)
+    # Aggregate over the full Time Period x Frequency x Cluster grid
+    values, _ = shared.group_grid(filtered_df, ["Time Period", "Frequency", "Cluster"], "SHAP_value", aggregation_method)
+    return pd.DataFrame(
+        values.reshape(len(FULL_ROW_INDEX), len(config.CLUSTER_ORDER)),
+        index=FULL_ROW_INDEX,
+        columns=config.CLUSTER_ORDER
+    )
 
-# Reorder with our fixed ordering
-pivot_df = pivot_df.reindex(
-    index=pd.MultiIndex.from_product([TIME_PERIOD_ORDER, FREQUENCY_ORDER]),
-    columns=CLUSTER_ORDER,
-    fill_value=0
-)
+pivot_df = compute_pivot(file_path, selections, aggregation_method)
 
 # Prepare data for heatmap
-heatmap_matrix = pivot_df.values
-row_labels = [f"{TIME_PERIOD_LABELS[time]}, {freq} ({FREQUENCY_RANGES[freq]})" for time, freq in pivot_df.index]
-col_labels = pivot_df.columns.tolist()
-
-# Create color scheme for time periods
-time_colors = {
-    '(-4, 0)': 'rgb(70, 130, 180)',   # Steel Blue
-    '(0, 5)': 'rgb(60, 179, 113)',    # Medium Sea Green
-    '(5, 10)': 'rgb(238, 130, 238)'   # Violet
-}
-
-# Get time period for each row
-row_time_periods = [pivot_df.index[i][0] for i in range(len(pivot_df.index))]
-row_colors = [time_colors[time] for time in row_time_periods]
-
-# Create the heatmap
-fig = go.Figure(
-    data=go.Heatmap(
-        z=heatmap_matrix,
-        x=col_labels,
-        y=row_labels,
-        colorscale="Viridis",
-        colorbar=dict(
-            title=f"SHAP Value ({aggregation_method})",
-            titleside="right",
-            title_font=dict(color='white')
-        ),
-        text=np.round(heatmap_matrix, 3),
-        hovertemplate="Cluster: %{x}<br>Time Period & Frequency: %{y}<br>SHAP Value: %{z:.3f}<extra></extra>"
+heatmap_matrix = pivot_df.to_numpy(dtype=np.float32, copy=False)
+
+# Build the figure skeleton (everything except the cell values)
+def build_figure(aggregation_method):
+    # Create the heatmap
+    fig = go.Figure(
+        data=go.Heatmap(
+            x=config.CLUSTER_ORDER,
+            y=ROW_LABELS,
+            colorscale="Viridis",
+            colorbar=dict(
+                title=f"SHAP Value ({aggregation_method})",
+                titleside="right",
+                title_font=dict(color='white')
+            ),
+            texttemplate="%{text}",
+            # The hover reuses the server-side formatted cell text rather than formatting z in the browser
+            hovertemplate="Cluster: %{x}<br>Time Period & Frequency: %{y}<br>SHAP Value: %{text}<extra></extra>"
+        )
     )
-)
 
-# Add colored rectangles for time periods
-for i, color in enumerate(row_colors):
-    fig.add_shape(
-        type="rect",
-        x0=-0.5,
-        x1=-0.4,
-        y0=i - 0.5,
-        y1=i + 0.5,
-        line=dict(width=0),
-        fillcolor=color,
+    # Add a color strip for time periods
+    n_periods = len(config.TIME_PERIOD_ORDER)
+    fig.add_trace(
+        go.Heatmap(
+            z=np.arange(len(ROW_LABELS)).reshape(-1, 1) // len(config.FREQUENCY_ORDER),
+            x=["Time Period"],
+            y=ROW_LABELS,
+            xaxis="x2",
+            zmin=0,
+            zmax=n_periods - 1,
+            colorscale=[
+                [i / (n_periods - 1), TIME_PERIOD_COLORS[time]] for i, time in enumerate(config.TIME_PERIOD_ORDER)
+            ],
+            showscale=False,
+            hoverinfo="skip"
+        )
     )
 
-# Add legend for time periods
-time_period_legend = [
-    go.Scatter(
-        x=[None],
-        y=[None],
-        mode="markers",
-        marker=dict(size=10, color=color),
-        name=TIME_PERIOD_LABELS[time],
-        showlegend=True
-    )
-    for time, color in time_colors.items()
-]
-fig.add_traces(time_period_legend)
-
-# Update layout
-fig.update_layout(
-    title=dict(
-        text="SHAP Values Distribution Across Brain Regions",
-        x=0.5,
-        font=dict(size=20, color='black')
-    ),
-    paper_bgcolor='white',
-    plot_bgcolor='white',
-    xaxis=dict(
-        title="Clusters (Left → Right, Front → Back)",
-        title_font=dict(size=16, color='black'),
-        tickfont=dict(size=12, color='black'),
-        gridcolor='#444444',
-        showgrid=True,
-        ticktext=[f"{CLUSTER_LABELS[cl]} ({cl})" for cl in CLUSTER_ORDER],
-        tickvals=col_labels
-    ),
-    yaxis=dict(
-        title="Time Period, Frequency",
-        title_font=dict(size=16, color='black'),
-        tickfont=dict(size=12, color='black'),
-        gridcolor='#444444',
-        showgrid=True
-    ),
-    margin=dict(l=150, r=50, t=100, b=150),
-    height=800,
-    width=1000,
-    legend=dict(
-        title="Time Period",
-        title_font=dict(color='black'),
-        font=dict(color='black'),
-        orientation="h",
-        y=-0.2,
-        x=0.5,
-        xanchor="center",
-        bgcolor='white'
+    # Add legend for time periods
+    legend_entries = ["Time Period"] + [
+        f"<span style='color:{TIME_PERIOD_COLORS[time]}'>■</span> {TIME_PERIOD_LABELS[time]}"
+        for time in config.TIME_PERIOD_ORDER
+    ]
+    for i, text in enumerate(legend_entries):
+        fig.add_annotation(
+            text=text,
+            x=0.5 + (i - (len(legend_entries) - 1) / 2) * 0.12,
+            y=-0.2,
+            xref="paper",
+            yref="paper",
+            xanchor="center",
+            showarrow=False,
+            font=dict(size=12, color='black')
+        )
+
+    # Update layout
+    fig.update_layout(
+        title=dict(
+            text="SHAP Values Distribution Across Brain Regions",
+            x=0.5,
+            font=dict(size=20, color='black')
+        ),
+        paper_bgcolor='white',
+        plot_bgcolor='white',
+        xaxis=dict(
+            title="Clusters (Left → Right, Front → Back)",
+            title_font=dict(size=16, color='black'),
+            tickfont=dict(size=12, color='black'),
+            gridcolor='#444444',
+            showgrid=True,
+            ticktext=COL_TICKTEXT,
+            tickvals=config.CLUSTER_ORDER,
+            domain=[0.03, 1]
+        ),
+        xaxis2=dict(
+            domain=[0, 0.02],
+            showticklabels=False,
+            showgrid=False,
+            zeroline=False
+        ),
+        yaxis=dict(
+            title="Time Period, Frequency",
+            title_font=dict(size=16, color='black'),
+            tickfont=dict(size=12, color='black'),
+            gridcolor='#444444',
+            showgrid=True,
+            anchor="x2"  # Tick labels left of the color strip
+        ),
+        margin=dict(l=150, r=50, t=100, b=150),
+        height=800,
+        width=1000
     )
+    return fig
+
+# Reuse the per-session figure skeleton and swap in the new values
+figure_key = f"shap_heatmap_figure_{aggregation_method}"
+if figure_key not in st.session_state:
+    st.session_state[figure_key] = build_figure(aggregation_method)
+fig = st.session_state[figure_key]
+fig.data[0].update(
+    z=heatmap_matrix,
+    text=np.char.mod('%.3f', heatmap_matrix),  # Formatted once server-side
 )
 
 # Display the heatmap
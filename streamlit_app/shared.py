@@ -0,0 +1,89 @@
+# shared.py
+# Data loading and sidebar filters shared by all dashboard pages
+
+import streamlit as st
+import numpy as np
+import pandas as pd
+
+import config
+
+# Sidebar label for each filter column
+FILTER_LABELS = {
+    'Cluster': "Select Clusters",
+    'Time Period': "Select Time Periods",
+    'Frequency': "Select Frequencies",
+    'Stimulus': "Select Stimuli",
+    'TargetScore': "Select Target Scores",
+}
+
+# Load dataset
+@st.cache_data
+def load_data(file_path, columns=None):
+    # Read only the requested columns, already typed
+    df = pd.read_parquet(file_path, engine='pyarrow', columns=list(columns) if columns else None)
+    # Sidebar options are the categories of each filter column
+    options = {col: df[col].cat.categories.tolist() for col in config.FILTER_COLUMNS}
+    return df, options
+
+# Render the sidebar filters form and return the applied selections as hashable cache keys
+def sidebar_filters(options):
+    with st.sidebar.form("filters"):
+        st.header("Filters")
+        selections = {
+            col: tuple(sorted(st.multiselect(FILTER_LABELS[col], options[col], default=options[col])))
+            for col in config.FILTER_COLUMNS
+        }
+        st.form_submit_button("Apply")
+    return selections
+
+# Bit-packed row membership of every category, uint8[n_categories, ceil(n_rows / 8)] per filter column
+@st.cache_data
+def membership_bitmaps(file_path, columns=None):
+    df, _ = load_data(file_path, columns)
+    return {
+        col: np.packbits(df[col].cat.codes.to_numpy() == np.arange(len(df[col].cat.categories))[:, None], axis=1)
+        for col in config.FILTER_COLUMNS
+    }
+
+# Filter the DataFrame based on selections (memoized per file, columns and filter state)
+@st.cache_data
+def filter_data(file_path, selections, columns=None):
+    df, _ = load_data(file_path, columns)
+    selected = {col: df[col].cat.categories.isin(values) for col, values in selections.items()}
+    # The default state selects every category, which keeps every row: skip the mask entirely
+    if all(flags.all() for flags in selected.values()):
+        return df
+    bitmaps = membership_bitmaps(file_path, columns)
+    # OR the bitmaps of the selected categories within a column, AND across columns, unpack once
+    packed = np.bitwise_and.reduce([
+        np.bitwise_or.reduce(bitmaps[col][np.flatnonzero(flags)], axis=0)
+        for col, flags in selected.items()
+    ])
+    mask = np.unpackbits(packed, count=len(df)).astype(bool)
+    return df.iloc[mask]
+
+# Sum or average a value column over every category combination, returning (values, counts) grids
+def group_grid(df, columns, value_column='SHAP_value', how='sum'):
+    sizes = [len(df[col].cat.categories) for col in columns]
+    keys = np.ravel_multi_index([df[col].cat.codes.to_numpy() for col in columns], sizes)
+    n_groups = int(np.prod(sizes))
+    totals = np.bincount(keys, weights=df[value_column].to_numpy(), minlength=n_groups).reshape(sizes)
+    counts = np.bincount(keys, minlength=n_groups).reshape(sizes)
+    if how == 'sum':
+        values = totals
+    elif how == 'mean':
+        values = totals / np.maximum(counts, 1)
+    else:
+        raise ValueError(f"Unsupported aggregation: {how!r} (expected 'sum' or 'mean')")
+    return values.astype(df[value_column].dtype), counts
+
+# Sum or average a value column per non-empty combination of categorical columns
+def group_aggregate(df, columns, value_column='SHAP_value', how='sum'):
+    values, counts = group_grid(df, columns, value_column, how)
+    observed = np.flatnonzero(counts)
+    result = pd.DataFrame({
+        col: pd.Categorical.from_codes(codes, dtype=df[col].dtype)
+        for col, codes in zip(columns, np.unravel_index(observed, counts.shape))
+    })
+    result[value_column] = values.ravel()[observed]
+    return result